@@ -1,25 +1,318 @@
 #!/usr/bin/env python3
 
 # Imports
-import xmltodict
+# Flask, geopy, numpy, orjson, requests and xmltodict are imported inside the functions that use them, so importing this module stays fast
+import os
+import json
+import time
+import threading
 import logging
-import statistics
-from statistics import mean
-import requests
 import math
 from math import sqrt
-from flask import Flask, request
-from geopy.geocoders import Nominatim
-import numpy as np
 from functools import partial
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from xml.parsers.expat import ExpatError
 
 # Global variables / constants
-app = Flask(__name__)
-geolocator = Nominatim(user_agent = 'agent')
+# The data source and geocoder can be pointed elsewhere (e.g. local stand-ins for load testing) with environment variables
+ISS_URL = os.environ.get('ISS_OEM_URL', 'https://nasa-public-data.s3.amazonaws.com/iss-coords/current/ISS_OEM/ISS.OEM_J2K_EPH.xml')
+NOMINATIM_DOMAIN = os.environ.get('NOMINATIM_DOMAIN', 'nominatim.openstreetmap.org')
+NOMINATIM_SCHEME = os.environ.get('NOMINATIM_SCHEME')
+JSON_SERIALIZER = os.environ.get('ISS_JSON_SERIALIZER', 'orjson') # 'orjson' (used when installed) or 'json' for the standard library
+geolocator = None # built on first use by get_geolocator
+ROUTES = [] # (rule, view function, options) registered by the route decorator and added to the app by create_app
+SNAPSHOT_TTL = float(os.environ.get('ISS_SNAPSHOT_TTL', 3600)) # default seconds before a feed's dataset is downloaded again
+REFRESH_WORKERS = int(os.environ.get('ISS_REFRESH_WORKERS', 4)) # feeds downloaded in parallel by the refresh pool
+REFRESHER_ENABLED = os.environ.get('ISS_REFRESHER', '1') != '0' # set ISS_REFRESHER=0 to only download feeds when a request finds them expired
+DEFAULT_FEED = 'iss'
+R_EARTH = 6371 # km
+MU_EARTH = 398600.4418 # km^3/s^2
+FEEDS = {}
+refresh_pool = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix='feed-refresh')
+refresher = None # the scheduler thread, started at most once per process by start_refresher
+refresher_lock = threading.Lock()
 
 # Class definitions
+class Snapshot:
+    """
+    One download of a spacecraft's OEM dataset together with the analytics derived from it. Everything is computed once when the snapshot is built, so reading it afterwards is constant time.
+
+    Args:
+        states (dict): The state vectors returned by get_dataset.
+
+        summary (dict): The comments returned by get_dataset.
+
+        items (int): The number of state vectors.
+
+        header (dict): The header values returned by read_header.
+
+        metadata (dict): The metadata values returned by read_metadata.
+
+    The JSON encoding of each epoch row, the comments, header, metadata, and analytics is also built once here, so routes can answer by joining cached bytes instead of serializing the same objects on every request.
+    """
+    def __init__(self, states: dict, summary: dict, items: int, header: dict = None, metadata: dict = None):
+        self.states = states
+        self.summary = summary
+        self.items = items
+        self.header = header
+        self.metadata = metadata
+        self.created = time.monotonic()
+        self.analytics = compute_analytics(states, items)
+
+        self.rows = [encode_json(row) for row in states['newtime'][:items]]
+        self.encoded = {
+            'comment': encode_json(summary['comment']),
+            'header': encode_json(header),
+            'metadata': encode_json(metadata),
+            'analytics': encode_json(self.analytics),
+        }
+
+    def expired(self, ttl: float):
+        """
+        Checks whether the snapshot is older than the given time-to-live.
+
+        Args:
+            ttl (float): The maximum age in seconds.
+
+        Returns:
+            expired (bool): True if the snapshot should be replaced.
+        """
+        return time.monotonic() - self.created > ttl
+
+class Feed:
+    """
+    A spacecraft that publishes a CCSDS OEM file, with its own snapshot cache and refresh schedule.
+
+    Args:
+        feed_id (str): The identifier used in the /objects/<object_id> routes.
+
+        url (str): The website url of the OEM xml dataset.
+
+        refresh (float): Seconds between downloads of the dataset.
+    """
+    def __init__(self, feed_id: str, url: str, refresh: float = SNAPSHOT_TTL):
+        self.id = feed_id
+        self.url = url
+        self.refresh = refresh
+        self.snapshot = None
+        self.retry_at = 0
+        self.lock = threading.Lock()
+
+    def due(self):
+        """
+        Checks whether the feed has no snapshot yet or its snapshot is older than the refresh interval. After a failed download the feed is not due again until its retry time.
+
+        Args:
+            None
+
+        Returns:
+            due (bool): True if the feed should be downloaded again.
+        """
+        if time.monotonic() < self.retry_at:
+            return False
+        current = self.snapshot
+        return current is None or current.expired(self.refresh)
+
+    def update(self, force: bool = False):
+        """
+        Downloads the dataset and publishes a new snapshot if the feed is due. Only one download per feed runs at a time; if it fails, the previous snapshot keeps being served.
+
+        Args:
+            force (bool): Download even if the current snapshot has not expired.
+
+        Returns:
+            snapshot (Snapshot): The current snapshot, or None if no download has succeeded yet.
+        """
+        import requests
+
+        with self.lock:
+            # Another request may have refreshed the feed while this one waited for the lock
+            if force or self.due():
+                try:
+                    self.snapshot = fetch_snapshot(self.url)
+                except (requests.RequestException, ExpatError, KeyError, TypeError, ValueError) as error:
+                    logging.warning('Could not refresh feed {}: {}'.format(self.id, error))
+                    self.retry_at = time.monotonic() + min(self.refresh, 60)
+            return self.snapshot
 
 # Function definitions
+def route(rule: str, **options):
+    """
+    Records a view function and its url rule so create_app can add it to each app it builds. Used as a decorator in place of app.route.
+
+    Args:
+        rule (str): The url rule, for example '/epochs/<epoch>'.
+
+        options (dict): Keyword arguments passed on to Flask's add_url_rule, such as methods and defaults.
+
+    Returns:
+        register (function): The decorator, which returns the view function unchanged.
+    """
+    def register(func):
+        ROUTES.append((rule, func, options))
+        return func
+    return register
+
+def create_app(refresh: bool = None):
+    """
+    Builds the Flask application with every route registered and starts the feed refresh scheduler. This is the entry point for WSGI servers, for example gunicorn 'iss_tracker:create_app()'.
+
+    Args:
+        refresh (bool): Whether to start the refresh scheduler; defaults to the ISS_REFRESHER environment variable.
+
+    Returns:
+        app (Flask): A new application instance.
+    """
+    from flask import Flask
+
+    app = Flask(__name__)
+    app.json = make_json_provider(app)
+    # The unprefixed routes fill in object_id from defaults; without this Werkzeug would redirect /objects/iss/... to them
+    app.url_map.redirect_defaults = False
+    for rule, func, options in ROUTES:
+        app.add_url_rule(rule, view_func=func, **options)
+
+    if refresh is None:
+        refresh = REFRESHER_ENABLED
+    if refresh:
+        start_refresher()
+    return app
+
+def encode_json(obj):
+    """
+    Serializes an object to compact JSON bytes with sorted keys and non-ASCII characters escaped, the same output Flask produces for a route's return value. Uses orjson, which also handles numpy values, when it is installed and selected by ISS_JSON_SERIALIZER.
+
+    Args:
+        obj (any): The object to serialize.
+
+    Returns:
+        encoded (bytes): The UTF-8 JSON encoding.
+    """
+    if JSON_SERIALIZER == 'orjson':
+        try:
+            import orjson
+            encoded = orjson.dumps(obj, option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+            # orjson never escapes non-ASCII text, so those objects are left to the json module
+            if encoded.isascii():
+                return encoded
+        except ImportError:
+            pass
+    return json.dumps(obj, sort_keys=True, separators=(',', ':')).encode('utf8')
+
+def make_json_provider(app):
+    """
+    Builds the JSON provider Flask uses to serialize route return values. When orjson is installed and selected by ISS_JSON_SERIALIZER, the provider encodes with orjson; otherwise Flask's default provider is used. The provider class is defined here so Flask is only imported when an app is built.
+
+    Args:
+        app (Flask): The application the provider belongs to.
+
+    Returns:
+        provider (JSONProvider): The JSON provider instance.
+    """
+    from flask.json.provider import DefaultJSONProvider
+
+    try:
+        import orjson
+    except ImportError:
+        orjson = None
+    if orjson is None or JSON_SERIALIZER != 'orjson':
+        return DefaultJSONProvider(app)
+
+    class OrjsonProvider(DefaultJSONProvider):
+        """
+        Flask JSON provider backed by orjson, with numpy support and sorted keys to match the default output. Calls with json.dumps or json.loads arguments that orjson cannot express, and output that needs non-ASCII characters escaped, are handed to the default provider.
+        """
+        def options(self, indent: bool = False, sort_keys: bool = True):
+            option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            if sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            return option
+
+        def dumps(self, obj, **kwargs):
+            # orjson writes either compact separators, or ': ' when indenting by two spaces, which json.dumps only matches when asked for exactly that
+            indent = kwargs.get('indent')
+            separators = kwargs.get('separators')
+            if indent is None:
+                supported = separators == (',', ':')
+            else:
+                supported = indent == 2 and separators in (None, (',', ': '))
+            if not supported or set(kwargs) - {'indent', 'separators', 'sort_keys', 'default', 'ensure_ascii'}:
+                return super().dumps(obj, **kwargs)
+
+            option = self.options(indent=indent is not None, sort_keys=kwargs.get('sort_keys', self.sort_keys))
+            encoded = orjson.dumps(obj, default=kwargs.get('default', self.default), option=option)
+            if kwargs.get('ensure_ascii', self.ensure_ascii) and not encoded.isascii():
+                return super().dumps(obj, **kwargs)
+            return encoded.decode('utf8')
+
+        def loads(self, s, **kwargs):
+            if kwargs:
+                return super().loads(s, **kwargs)
+            return orjson.loads(s)
+
+        def response(self, *args, **kwargs):
+            obj = self._prepare_response_obj(args, kwargs)
+            indent = (self.compact is None and self._app.debug) or self.compact is False
+            encoded = orjson.dumps(obj, default=self.default, option=self.options(indent, self.sort_keys))
+            if self.ensure_ascii and not encoded.isascii():
+                return super().response(obj)
+            return self._app.response_class(encoded + b'\n', mimetype=self.mimetype)
+
+    return OrjsonProvider(app)
+
+def json_response(body: bytes):
+    """
+    Wraps already encoded JSON bytes in a response, skipping serialization. When the JSON provider pretty-prints responses, as it does in debug mode, the body is decoded and encoded again by the provider so every route is formatted the same way.
+
+    Args:
+        body (bytes): The compact JSON encoding of the response.
+
+    Returns:
+        response (Response): A response with the application/json mimetype.
+    """
+    from flask import current_app
+
+    provider = current_app.json
+    compact = getattr(provider, 'compact', None)
+    if (compact is None and current_app.debug) or compact is False:
+        return provider.response(provider.loads(body))
+    return current_app.response_class(body + b'\n', mimetype='application/json')
+
+def get_geolocator():
+    """
+    Returns the Nominatim reverse geocoding client, constructing it the first time it is needed.
+
+    Args:
+        None
+
+    Returns:
+        geolocator (Nominatim): The shared geocoding client.
+    """
+    global geolocator
+
+    if geolocator is None:
+        from geopy.geocoders import Nominatim
+        geolocator = Nominatim(user_agent = 'agent', domain = NOMINATIM_DOMAIN, scheme = NOMINATIM_SCHEME)
+    return geolocator
+
+def __getattr__(name: str):
+    """
+    Builds the module level 'app' the first time it is accessed, for code that imports it directly (for example 'from iss_tracker import app'). This app does not start the refresh scheduler, so importing it never begins a download in the background; servers that want the schedule use create_app() or run this file.
+
+    Args:
+        name (str): The attribute being looked up.
+
+    Returns:
+        app (Flask): The shared application instance.
+    """
+    if name == 'app':
+        globals()['app'] = create_app(refresh = False)
+        return globals()['app']
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
 def get_dataset(url: str):
     """
     Ingests an url for a website with an xml dataset. Then gets the dataset using the requests library and splits the dataset into two list-dictionaries (a list of dictionaries)- one for summary information and on for data. 
@@ -34,6 +327,9 @@ def get_dataset(url: str):
 
         items (int): The integer number of timestamp recordings of spacecraft state data. 
     """
+    import requests
+    import xmltodict
+
     try:
         response = requests.get(url)
         response.status_code
@@ -42,6 +338,25 @@ def get_dataset(url: str):
     except TypeError:
         logging.warning('The input value is not a valid string')
 
+    with open('ISS.xml', 'r') as f:
+        reader = xmltodict.parse(f.read())
+
+    return read_dataset(reader)
+
+def read_dataset(reader: dict):
+    """
+    Splits a parsed OEM xml dataset into two list-dictionaries (a list of dictionaries)- one for summary information and one for data.
+
+    Args:
+        reader (dict): The dataset as parsed by xmltodict.
+
+    Returns:
+        states (list): A list of iterable python dictionaries for the states of the spacecraft at each timestamp. 
+
+        summary (list): A list of iterable python dictionaries for initial comments in the dataset. 
+
+        items (int): The integer number of timestamp recordings of spacecraft state data. 
+    """
     # logging state vectors of [UTC time, position, and velocity] in order
     states = {}
     states['newtime'] = []
@@ -50,34 +365,85 @@ def get_dataset(url: str):
     items = 0
 
     try:
-        with open('ISS.xml', 'r') as f:
-            reader = xmltodict.parse(f.read())
-            for row in reader['ndm']['oem']['body']['segment']['data']['stateVector']:
-                states['newtime'].append(row)
-                items += 1
-            for row in reader['ndm']['oem']['body']['segment']['data']['COMMENT']:
-                summary['comment'].append(row)
+        for row in reader['ndm']['oem']['body']['segment']['data']['stateVector']:
+            states['newtime'].append(row)
+            items += 1
+        for row in reader['ndm']['oem']['body']['segment']['data']['COMMENT']:
+            summary['comment'].append(row)
     except KeyError:
         logging.warning('The input dataset is not what this function is intended for.')
 
     return states, summary, items
 
-@app.route('/epochs', methods=['GET']) # Fix this, it only takes in the first query parameter defined in the route. 
-def return_iss_dataset():
+def read_header(reader: dict):
     """
-    Finds ISS tracking dataset from xml website dataset. Then aquires the dataset using the requests library and outputs the list-dictionaries (a list of dictionaries). The optional query parameters allow for an indexing of the whole dataset. Using the limit or end index, an offset value is provided to denote the number of datapoints. The final output is a dictionary that ends at index 'limit' and starts at 'offset' points before the 'limit' index. 
+    Gets the header values from a parsed OEM xml dataset.
 
     Args:
-        None
+        reader (dict): The dataset as parsed by xmltodict.
+
+    Returns:
+        header (dict): The creation date and originator, each in a list.
+    """
+    header = {}
+    header['CREATION_DATE'] = [reader['ndm']['oem']['header']['CREATION_DATE']]
+    header['ORIGINATOR'] = [reader['ndm']['oem']['header']['ORIGINATOR']]
+    return header
+
+def read_metadata(reader: dict):
+    """
+    Gets the metadata values from a parsed OEM xml dataset.
+
+    Args:
+        reader (dict): The dataset as parsed by xmltodict.
+
+    Returns:
+        metadata (dict): The object name, ID, center name, data reference frame, time system, start time, and end time, each in a list.
+    """
+    index = reader['ndm']['oem']['body']['segment']['metadata']
+    metadata = {}
+    for key in ['OBJECT_NAME', 'OBJECT_ID', 'CENTER_NAME', 'REF_FRAME', 'TIME_SYSTEM', 'START_TIME', 'STOP_TIME']:
+        metadata[key] = [index[key]]
+    return metadata
+
+def fetch_snapshot(url: str):
+    """
+    Downloads an OEM xml dataset and builds a snapshot from it. The dataset is parsed in memory rather than through ISS.xml so several feeds can be downloaded at once.
+
+    Args:
+        url (str): The website url accessing the xml dataset
+
+    Returns:
+        snapshot (Snapshot): The parsed dataset with its precomputed analytics.
+    """
+    import requests
+    import xmltodict
+
+    response = requests.get(url, timeout=60)
+    response.raise_for_status()
+    reader = xmltodict.parse(response.content)
+    states, summary, items = read_dataset(reader)
+    return Snapshot(states, summary, items, read_header(reader), read_metadata(reader))
+
+@route('/epochs', methods=['GET'], defaults={'object_id': DEFAULT_FEED}) # Fix this, it only takes in the first query parameter defined in the route. 
+@route('/objects/<object_id>/epochs', methods=['GET'])
+def return_iss_dataset(object_id):
+    """
+    Finds ISS tracking dataset from xml website dataset. Then aquires the dataset using the requests library and outputs the list-dictionaries (a list of dictionaries). The optional query parameters allow for an indexing of the whole dataset. Using the limit or end index, an offset value is provided to denote the number of datapoints. The final output is a dictionary that ends at index 'limit' and starts at 'offset' points before the 'limit' index. Without query parameters the whole dataset is returned.
+
+    Args:
+        object_id (str): The identifier of the tracked object, 'iss' for the routes without the /objects prefix.
         
     Returns:
         dataset (dict): A list of iterable python dictionaries that make up the ISS tracking dataset.  
     """
-    url = 'https://nasa-public-data.s3.amazonaws.com/iss-coords/current/ISS_OEM/ISS.OEM_J2K_EPH.xml'
-    states, summary, items = get_dataset(url)
+    from flask import request
+
+    current = get_snapshot(object_id)
+    items = current.items
 
     try:
-        offset = int(request.args.get(key='offset', default=0))
+        offset = int(request.args.get(key='offset', default=items))
         limit = int(request.args.get(key='limit', default=items))
     except TypeError:
         logging.warning("Invalid offset or limit parameter; both must be an integer.")
@@ -87,16 +453,8 @@ def return_iss_dataset():
     else:
         start = 0
 
-    aug_states = {}
-    aug_states['newtime'] = []
-    index = 0
-
-    for row in states['newtime']:
-        if index >= start and index < limit:
-            aug_states['newtime'].append(row)
-        index += 1
-
-    return aug_states
+    # Each row was encoded when the snapshot was published, so the response is assembled from cached bytes
+    return json_response(b'{"newtime":[' + b','.join(current.rows[start:max(limit, 0)]) + b']}')
 
 def time_range(time1: str, time2: str):
     """
@@ -172,16 +530,191 @@ def calculate_speed(states: list, items: int):
     except ValueError:
         logging.warning('Please input the correct ISS tracking dataset.')
 
+    from statistics import mean
+
     speed = mean(speeds)
     return speed, instSpeed
 
-@app.route('/now', methods=['GET']) # update using location function
-def return_iss_now():
+def describe(values):
     """
-    Finds ISS tracking dataset from xml website dataset. Then analyzes the state at the final recorded epoch using the requests library.
+    Summarizes an array of values with its minimum, maximum, mean, and percentiles.
+
+    Args:
+        values (ndarray): A one dimensional numpy array.
+
+    Returns:
+        stats (dict): The min, max, mean, and 5th, 25th, 50th, 75th, 95th and 99th percentiles as floats.
+    """
+    import numpy as np
+
+    p5, p25, p50, p75, p95, p99 = np.percentile(values, [5, 25, 50, 75, 95, 99])
+    return {'min': float(values.min()), 'max': float(values.max()), 'mean': float(values.mean()),
+            'p5': float(p5), 'p25': float(p25), 'p50': float(p50), 'p75': float(p75), 'p95': float(p95), 'p99': float(p99)}
+
+def compute_analytics(states: dict, items: int):
+    """
+    Computes speed and altitude time series and statistics, the orbital period, and the number of orbits across the dataset using vectorized numpy operations. The period at each epoch comes from the specific orbital energy of its state vector (vis-viva equation).
+
+    Args:
+        states (dict): A dictionary with a 'newtime' list of state vectors as returned by get_dataset.
+
+        items (int): The integer number of timestamp recordings of spacecraft state data.
+
+    Returns:
+        analytics (dict): The analytics for the whole dataset, ready to be returned from a route.
+    """
+    import numpy as np
+
+    rows = states['newtime'][:items]
+    if not rows:
+        return {'epochs': 0}
+
+    vectors = np.array([[row['X']['#text'], row['Y']['#text'], row['Z']['#text'], row['X_DOT']['#text'], row['Y_DOT']['#text'], row['Z_DOT']['#text']] for row in rows], dtype=float)
+    radius = np.linalg.norm(vectors[:, :3], axis=1)
+    speed = np.linalg.norm(vectors[:, 3:], axis=1)
+    altitude = radius - R_EARTH
+
+    # Specific orbital energy gives the semi-major axis, and with it the period, of each state vector
+    energy = speed**2 / 2 - MU_EARTH / radius
+    bound = energy < 0
+    semi_major = -MU_EARTH / (2 * energy[bound])
+    period = 2 * math.pi * np.sqrt(semi_major**3 / MU_EARTH) / 60 # minutes
+
+    # Because all epoch times are same format, parse only the first and last to find the time window
+    start = datetime.strptime(rows[0]['EPOCH'], '%Y-%jT%H:%M:%S.%fZ')
+    stop = datetime.strptime(rows[-1]['EPOCH'], '%Y-%jT%H:%M:%S.%fZ')
+    window = (stop - start).total_seconds() / 60 # minutes
+
+    analytics = {
+        'epochs': len(rows),
+        'start': rows[0]['EPOCH'],
+        'stop': rows[-1]['EPOCH'],
+        'window_minutes': window,
+        'speed': describe(speed),
+        'altitude': describe(altitude),
+        'period': describe(period) if period.size else None,
+        'orbits': window / float(period.mean()) if period.size else None,
+        'series': {
+            'epoch': [row['EPOCH'] for row in rows],
+            'speed': speed.tolist(),
+            'altitude': altitude.tolist(),
+        },
+    }
+    return analytics
+
+def register_feed(feed_id: str, url: str, refresh: float = SNAPSHOT_TTL):
+    """
+    Adds a spacecraft OEM feed to the registry, replacing any feed with the same identifier.
+
+    Args:
+        feed_id (str): The identifier used in the /objects/<object_id> routes.
+
+        url (str): The website url of the OEM xml dataset.
+
+        refresh (float): Seconds between downloads of the dataset.
+
+    Returns:
+        feed (Feed): The registered feed.
+    """
+    feed = Feed(feed_id, url, refresh)
+    FEEDS[feed_id] = feed
+    return feed
+
+def load_feeds(config: str = None):
+    """
+    Registers the ISS feed and any feeds given as a JSON object, for example '{"css": {"url": "https://...", "refresh": 1800}}'.
 
     Args:
+        config (str): The JSON feed configuration, normally the ISS_FEEDS environment variable.
+
+    Returns:
         None
+    """
+    register_feed(DEFAULT_FEED, ISS_URL)
+    if not config:
+        return
+
+    try:
+        for feed_id, options in json.loads(config).items():
+            register_feed(feed_id, options['url'], float(options.get('refresh', SNAPSHOT_TTL)))
+    except (ValueError, KeyError, AttributeError, TypeError):
+        logging.warning('ISS_FEEDS must be a JSON object mapping feed ids to {"url": ..., "refresh": ...}')
+
+def get_snapshot(object_id: str = DEFAULT_FEED):
+    """
+    Returns the current snapshot of a feed, downloading and publishing a new one if there is none yet or the current one is older than the feed's refresh interval. While the refresh scheduler is running an expired snapshot is still returned, since the scheduler replaces it; only a feed with no snapshot is downloaded by the request. Aborts with 404 for an unknown feed and 503 if the feed has never been downloaded successfully.
+
+    Args:
+        object_id (str): The feed identifier.
+
+    Returns:
+        snapshot (Snapshot): The current snapshot.
+    """
+    from flask import abort
+
+    feed = FEEDS.get(object_id)
+    if feed is None:
+        abort(404, 'Unknown object {}'.format(object_id))
+
+    current = feed.snapshot
+    scheduled = refresher is not None and refresher.is_alive()
+    if feed.due() and (current is None or not scheduled):
+        current = feed.update()
+    if current is None:
+        abort(503, 'The dataset for {} is not available'.format(object_id))
+    return current
+
+def refresh_feeds(force: bool = False):
+    """
+    Downloads every feed that is due for a refresh, in parallel on the refresh pool.
+
+    Args:
+        force (bool): Download every feed even if its snapshot has not expired.
+
+    Returns:
+        refreshed (list): The identifiers of the feeds that were downloaded.
+    """
+    due = [feed for feed in list(FEEDS.values()) if force or feed.due()]
+    futures = [refresh_pool.submit(feed.update, force) for feed in due]
+    for future in futures:
+        future.result()
+    return [feed.id for feed in due]
+
+def start_refresher(interval: float = 1.0):
+    """
+    Starts a background thread that downloads every feed right away and then keeps each one on its refresh schedule, so requests rarely wait on a download. Only one scheduler runs per process; later calls return the running thread.
+
+    Args:
+        interval (float): Seconds between checks for feeds that are due.
+
+    Returns:
+        thread (Thread): The running daemon thread.
+    """
+    global refresher
+
+    def run():
+        while True:
+            try:
+                refresh_feeds()
+            except Exception:
+                # Keep the schedule alive; the next pass retries whatever failed
+                logging.exception('Refreshing feeds failed')
+            time.sleep(interval)
+
+    with refresher_lock:
+        if refresher is None or not refresher.is_alive():
+            refresher = threading.Thread(target=run, name='feed-scheduler', daemon=True)
+            refresher.start()
+        return refresher
+
+@route('/now', methods=['GET'], defaults={'object_id': DEFAULT_FEED}) # update using location function
+@route('/objects/<object_id>/now', methods=['GET'])
+def return_iss_now(object_id):
+    """
+    Finds ISS tracking dataset from xml website dataset. Then analyzes the state at the final recorded epoch using the requests library.
+
+    Args:
+        object_id (str): The identifier of the tracked object, 'iss' for the routes without the /objects prefix.
         
     Returns:
         instSpeed (float): A value representative of the instantaneous speed of the ISS in its final recorded epoch. 
@@ -190,8 +723,8 @@ def return_iss_now():
 
         location.address (str): A string of the nearest address of the ISS based on longitude and latitude in its final recorded epoch. 
     """
-    url = 'https://nasa-public-data.s3.amazonaws.com/iss-coords/current/ISS_OEM/ISS.OEM_J2K_EPH.xml'
-    states, summary, items = get_dataset(url)
+    current = get_snapshot(object_id)
+    states, summary, items = current.states, current.summary, current.items
 
     final_index = items - 1
     end_state = states['newtime'][final_index]
@@ -234,7 +767,7 @@ def return_iss_now():
 
     # Finding geolocation
     coordstr = str(lat) + ', ' + str(lon)
-    reverse = partial(geolocator.reverse, language="es")
+    reverse = partial(get_geolocator().reverse, language="es")
     location = reverse(coordstr)
     geolocUnicode = str(location)
     geolocEncoded = geolocUnicode.encode("ascii", "ignore")
@@ -247,19 +780,22 @@ def return_iss_now():
     else:
         return [instSpeed, posVec, geoloc]
 
-@app.route('/epochs/<epoch>', methods=['GET'])
-def return_iss_state(epoch):
+@route('/epochs/<epoch>', methods=['GET'], defaults={'object_id': DEFAULT_FEED})
+@route('/objects/<object_id>/epochs/<epoch>', methods=['GET'])
+def return_iss_state(epoch, object_id):
     """
     Finds ISS tracking dataset from xml website dataset. Then aquires the full state information from a specific epoch using the requests library.
 
     Args:
-        None
+        epoch (str): The index of the epoch in the dataset.
+
+        object_id (str): The identifier of the tracked object, 'iss' for the routes without the /objects prefix.
         
     Returns:
         stateVector (list): A list of of the state position and velocity values for a specific epoch in the dataset.
     """
-    url = 'https://nasa-public-data.s3.amazonaws.com/iss-coords/current/ISS_OEM/ISS.OEM_J2K_EPH.xml'
-    states, summary, items = get_dataset(url)
+    current = get_snapshot(object_id)
+    states, summary, items = current.states, current.summary, current.items
 
     try:
         epoch = int(epoch)
@@ -271,19 +807,22 @@ def return_iss_state(epoch):
 
     return stateVector
 
-@app.route('/epochs/<epoch>/speed', methods=['GET'])
-def return_iss_speed(epoch):
+@route('/epochs/<epoch>/speed', methods=['GET'], defaults={'object_id': DEFAULT_FEED})
+@route('/objects/<object_id>/epochs/<epoch>/speed', methods=['GET'])
+def return_iss_speed(epoch, object_id):
     """
     Finds ISS tracking dataset from xml website dataset. Then aquires the instantaneous speed from a specific epoch using the requests library.
 
     Args:
-        None
+        epoch (str): The index of the epoch in the dataset.
+
+        object_id (str): The identifier of the tracked object, 'iss' for the routes without the /objects prefix.
         
     Returns:
         vmag (list): A value representative of the instantaneous speed of the ISS for the specific epoch defined.  
     """
-    url = 'https://nasa-public-data.s3.amazonaws.com/iss-coords/current/ISS_OEM/ISS.OEM_J2K_EPH.xml'
-    states, summary, items = get_dataset(url)
+    current = get_snapshot(object_id)
+    states, summary, items = current.states, current.summary, current.items
 
     try:
         epoch = int(epoch)
@@ -298,100 +837,58 @@ def return_iss_speed(epoch):
     vmag = sqrt((vx**2)+(vy**2)+(vz**2))
     return [vmag]
 
-@app.route('/comment', methods=['GET'])
-def return_iss_comment():
+@route('/comment', methods=['GET'], defaults={'object_id': DEFAULT_FEED})
+@route('/objects/<object_id>/comment', methods=['GET'])
+def return_iss_comment(object_id):
     """
     Finds ISS tracking dataset from xml website dataset. Then aquires summary commentary using the requests library.
 
     Args:
-        None
+        object_id (str): The identifier of the tracked object, 'iss' for the routes without the /objects prefix.
         
     Returns:
         comments (list): The values denoted in the 'comment' key of the ISS dataset.  
     """
-    url = 'https://nasa-public-data.s3.amazonaws.com/iss-coords/current/ISS_OEM/ISS.OEM_J2K_EPH.xml'
-    states, summary, items = get_dataset(url)
-
-    return summary['comment']
+    return json_response(get_snapshot(object_id).encoded['comment'])
 
-@app.route('/header', methods=['GET'])
-def return_iss_header():
+@route('/header', methods=['GET'], defaults={'object_id': DEFAULT_FEED})
+@route('/objects/<object_id>/header', methods=['GET'])
+def return_iss_header(object_id):
     """
     Finds ISS tracking dataset from xml website dataset. Then aquires header data using the requests library.
 
     Args:
-        None
+        object_id (str): The identifier of the tracked object, 'iss' for the routes without the /objects prefix.
         
     Returns:
         header (dict): The values denoted in the 'header' key of the ISS dataset.  
     """
-    url = 'https://nasa-public-data.s3.amazonaws.com/iss-coords/current/ISS_OEM/ISS.OEM_J2K_EPH.xml'
-
-    response = requests.get(url)
-    response.status_code
-    response.content
-    open('ISS.xml', 'wb').write(response.content)
+    return json_response(get_snapshot(object_id).encoded['header'])
 
-    header = {}
-    header['CREATION_DATE'] = []
-    header['ORIGINATOR'] = []
-
-    with open('ISS.xml', 'r') as f:
-        reader = xmltodict.parse(f.read())
-        header['CREATION_DATE'].append(reader['ndm']['oem']['header']['CREATION_DATE'])
-        header['ORIGINATOR'].append(reader['ndm']['oem']['header']['ORIGINATOR'])
-        
-    return header
-
-@app.route('/metadata', methods=['GET'])
-def return_iss_metadata():
+@route('/metadata', methods=['GET'], defaults={'object_id': DEFAULT_FEED})
+@route('/objects/<object_id>/metadata', methods=['GET'])
+def return_iss_metadata(object_id):
     """
     Finds ISS tracking dataset from xml website dataset. Then aquires the metadata using the requests library.
 
     Args:
-        None
+        object_id (str): The identifier of the tracked object, 'iss' for the routes without the /objects prefix.
         
     Returns:
         metadata (dict): The values denoted in the 'metadata' key of the ISS dataset.  
     """
-    url = 'https://nasa-public-data.s3.amazonaws.com/iss-coords/current/ISS_OEM/ISS.OEM_J2K_EPH.xml'
-
-    response = requests.get(url)
-    response.status_code
-    response.content
-    open('ISS.xml', 'wb').write(response.content)
+    return json_response(get_snapshot(object_id).encoded['metadata'])
 
-    metadata = {}
-    metadata['OBJECT_NAME'] = []
-    metadata['OBJECT_ID'] = []
-    metadata['CENTER_NAME'] = []
-    metadata['REF_FRAME'] = []
-    metadata['TIME_SYSTEM'] = []
-    metadata['START_TIME'] = []
-    metadata['STOP_TIME'] = []
-
-    with open('ISS.xml', 'r') as f:
-        reader = xmltodict.parse(f.read())
-        index = reader['ndm']['oem']['body']['segment']['metadata']
-        
-        # Getting all metadata using index
-        metadata['OBJECT_NAME'].append(index['OBJECT_NAME'])
-        metadata['OBJECT_ID'].append(index['OBJECT_ID'])
-        metadata['CENTER_NAME'].append(index['CENTER_NAME'])
-        metadata['REF_FRAME'].append(index['REF_FRAME'])
-        metadata['TIME_SYSTEM'].append(index['TIME_SYSTEM'])
-        metadata['START_TIME'].append(index['START_TIME'])
-        metadata['STOP_TIME'].append(index['STOP_TIME'])
-        
-    return metadata
-
-@app.route('/epochs/<epoch>/location', methods=['GET']) 
-def return_iss_location(epoch):
+@route('/epochs/<epoch>/location', methods=['GET'], defaults={'object_id': DEFAULT_FEED})
+@route('/objects/<object_id>/epochs/<epoch>/location', methods=['GET'])
+def return_iss_location(epoch, object_id):
     """
     Finds ISS tracking dataset from xml website dataset. Then analyzes the state at a specific epoch using the requests library.
 
     Args:
-        None
+        epoch (str): The index of the epoch in the dataset.
+
+        object_id (str): The identifier of the tracked object, 'iss' for the routes without the /objects prefix.
         
     Returns:
         instSpeed (float): A value representative of the instantaneous speed of the ISS in its final recorded epoch. 
@@ -400,8 +897,8 @@ def return_iss_location(epoch):
 
         location.address (str): A string of the nearest address of the ISS based on longitude and latitude in its final recorded epoch. 
     """
-    url = 'https://nasa-public-data.s3.amazonaws.com/iss-coords/current/ISS_OEM/ISS.OEM_J2K_EPH.xml'
-    states, summary, items = get_dataset(url)
+    current = get_snapshot(object_id)
+    states, summary, items = current.states, current.summary, current.items
 
     try:
         epoch = int(epoch)
@@ -436,7 +933,7 @@ def return_iss_location(epoch):
 
     # Finding geolocation and setting it to appropriate type
     coordstr = str(lat) + ', ' + str(lon)
-    reverse = partial(geolocator.reverse, language="es")
+    reverse = partial(get_geolocator().reverse, language="es")
     location = reverse(coordstr, zoom=20)
     geolocUnicode = str(location)
     geolocEncoded = geolocUnicode.encode("ascii", "ignore")
@@ -449,6 +946,42 @@ def return_iss_location(epoch):
     else:
         return [posVec, geoloc]
 
+@route('/analytics', methods=['GET'], defaults={'object_id': DEFAULT_FEED})
+@route('/objects/<object_id>/analytics', methods=['GET'])
+def return_iss_analytics(object_id):
+    """
+    Returns analytics over the whole ISS tracking dataset: the speed and altitude time series with their min, max, mean, and percentiles, the orbital period estimated from the state vectors, and the number of orbits in the time window. The values are precomputed when the dataset snapshot is published.
+
+    Args:
+        object_id (str): The identifier of the tracked object, 'iss' for the routes without the /objects prefix.
+        
+    Returns:
+        analytics (dict): Speeds in km/s, altitudes in km, the period and window in minutes, and the orbit count.
+    """
+    return json_response(get_snapshot(object_id).encoded['analytics'])
+
+@route('/objects', methods=['GET'])
+def return_objects():
+    """
+    Lists the tracked objects in the feed registry without downloading any datasets.
+
+    Args:
+        None
+        
+    Returns:
+        objects (dict): For each object id, its dataset url, refresh interval in seconds, number of epochs in the current snapshot (None if not downloaded yet), and snapshot age in seconds.
+    """
+    objects = {}
+    for feed in list(FEEDS.values()):
+        current = feed.snapshot
+        objects[feed.id] = {
+            'url': feed.url,
+            'refresh': feed.refresh,
+            'epochs': current.items if current is not None else None,
+            'age': time.monotonic() - current.created if current is not None else None,
+        }
+    return objects
+
 # Main function definition
 def main():
 
@@ -456,8 +989,7 @@ def main():
     logging.debug('Starting main script')
 
     # Obtaining url from website link
-    url = 'https://nasa-public-data.s3.amazonaws.com/iss-coords/current/ISS_OEM/ISS.OEM_J2K_EPH.xml'
-    states, summary, items = get_dataset(url)
+    states, summary, items = get_dataset(ISS_URL)
 
     logging.error('Recieved and interpreted the dataset successfully')
 
@@ -485,6 +1017,10 @@ def main():
     
     logging.info('Ending main script')
 
+# Feed registry
+load_feeds(os.environ.get('ISS_FEEDS'))
+
 # Run Flask
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0')
+    # With debug=True the reloader runs the app in a child process; only that process needs the refresh schedule
+    create_app(refresh = REFRESHER_ENABLED and os.environ.get('WERKZEUG_RUN_MAIN') == 'true').run(debug=True, host='0.0.0.0')
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+
+# Imports
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import statistics
+from datetime import datetime, timezone
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Refreshes stay under the benchmark's control instead of hitting the real feeds in the background
+os.environ.setdefault('ISS_REFRESHER', '0')
+
+import iss_tracker
+from oem_generator import generate_oem
+
+# Global variables / constants
+DEFAULT_SIZES = [5000, 50000]
+DEFAULT_ROUTES = ['/epochs', '/epochs?limit=100&offset=50', '/epochs/10', '/epochs/10/speed', '/epochs/10/location', '/now', '/comment', '/header', '/metadata', '/analytics']
+
+# Class definitions
+class FakeResponse:
+    """
+    Stands in for the requests.Response returned when downloading the OEM file.
+    """
+    def __init__(self, content: bytes):
+        self.status_code = 200
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+class FakeGeolocator:
+    """
+    Stands in for the Nominatim client so route timings do not include network calls.
+    """
+    def reverse(self, query, *args, **kwargs):
+        return 'Synthetic Place, Nowhere'
+
+# Function definitions
+def time_call(func, repeat: int):
+    """
+    Times repeated calls of a function with no arguments.
+
+    Args:
+        func (callable): The function to time.
+
+        repeat (int): The number of calls to make.
+
+    Returns:
+        timings (list): The wall-clock duration of each call in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def summarize(timings: list):
+    """
+    Reduces a list of timings to summary statistics.
+
+    Args:
+        timings (list): Durations in seconds.
+
+    Returns:
+        summary (dict): The min, median, and max duration in seconds.
+    """
+    return {'min': min(timings), 'median': statistics.median(timings), 'max': max(timings)}
+
+def bench_size(epochs: int, repeat: int, routes: list):
+    """
+    Benchmarks dataset parsing, snapshot building, speed calculation, and route latency against one synthetic OEM file.
+
+    Args:
+        epochs (int): The number of state vectors in the synthetic file.
+
+        repeat (int): The number of repetitions per measurement.
+
+        routes (list): The routes to request through the Flask test client, or an empty list to skip them.
+
+    Returns:
+        results (dict): The measurements for this file size.
+    """
+    content = generate_oem(epochs)
+    results = {'epochs': epochs, 'bytes': len(content)}
+
+    with mock.patch('requests.get', return_value=FakeResponse(content)), \
+         mock.patch.object(iss_tracker, 'geolocator', FakeGeolocator()), \
+         mock.patch.object(iss_tracker, 'FEEDS', {}):
+
+        # Parse time is measured separately from peak memory since tracing slows allocation
+        results['get_dataset'] = summarize(time_call(lambda: iss_tracker.get_dataset(iss_tracker.ISS_URL), repeat))
+        tracemalloc.start()
+        states, summary, items = iss_tracker.get_dataset(iss_tracker.ISS_URL)
+        results['get_dataset']['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results['calculate_speed'] = summarize(time_call(lambda: iss_tracker.calculate_speed(states, items), repeat))
+        results['fetch_snapshot'] = summarize(time_call(lambda: iss_tracker.fetch_snapshot(iss_tracker.ISS_URL), repeat))
+
+        # Routes are timed against a published snapshot, the way the service answers once it is warm
+        iss_tracker.register_feed(iss_tracker.DEFAULT_FEED, iss_tracker.ISS_URL).update()
+
+        results['routes'] = {}
+        client = iss_tracker.app.test_client()
+        for route in routes:
+            def get():
+                response = client.get(route)
+                if response.status_code != 200:
+                    raise RuntimeError('{} returned {}'.format(route, response.status_code))
+            results['routes'][route] = summarize(time_call(get, repeat))
+
+        results['serialize'] = bench_serialization(iss_tracker.FEEDS[iss_tracker.DEFAULT_FEED].snapshot, repeat)
+
+    return results
+
+def bench_serialization(snapshot, repeat: int):
+    """
+    Compares ways of serializing the full /epochs response: Flask's default JSON provider, the orjson provider (when installed), and joining the snapshot's pre-encoded rows. Also times encoding the rows, which is paid once when a snapshot is published.
+
+    Args:
+        snapshot (Snapshot): The published snapshot to serialize.
+
+        repeat (int): The number of repetitions per measurement.
+
+    Returns:
+        results (dict): The timings for each serializer and the response size in bytes.
+    """
+    from flask.json.provider import DefaultJSONProvider
+
+    app = iss_tracker.create_app()
+    dataset = {'newtime': snapshot.states['newtime'][:snapshot.items]}
+    serializers = {
+        'flask_default': lambda: DefaultJSONProvider(app).response(dataset),
+        'fragments': lambda: iss_tracker.json_response(b'{"newtime":[' + b','.join(snapshot.rows) + b']}'),
+        'encode_rows': lambda: [iss_tracker.encode_json(row) for row in dataset['newtime']],
+    }
+    provider = iss_tracker.make_json_provider(app)
+    if type(provider) is not DefaultJSONProvider:
+        serializers['orjson_provider'] = lambda: provider.response(dataset)
+
+    results = {}
+    with app.app_context():
+        results['bytes'] = len(serializers['fragments']().get_data())
+        for name, serialize in serializers.items():
+            results[name] = summarize(time_call(serialize, repeat))
+    return results
+
+def flatten(results: dict):
+    """
+    Flattens a benchmark report into metric names and values so two reports can be compared.
+
+    Args:
+        results (dict): The 'results' section of a benchmark report.
+
+    Returns:
+        metrics (dict): Values keyed by a slash-separated path, for example '5000/get_dataset/median'.
+    """
+    metrics = {}
+    for size, measurements in results.items():
+        for name, values in measurements.items():
+            if name == 'routes':
+                for route, route_values in values.items():
+                    metrics['{}/route {}/median'.format(size, route)] = route_values['median']
+            elif name == 'serialize':
+                for serializer, timings in values.items():
+                    if isinstance(timings, dict):
+                        metrics['{}/serialize {}/median'.format(size, serializer)] = timings['median']
+            elif isinstance(values, dict):
+                for key in ('median', 'peak_bytes'):
+                    if key in values:
+                        metrics['{}/{}/{}'.format(size, name, key)] = values[key]
+    return metrics
+
+def compare(current: dict, baseline: dict, threshold: float):
+    """
+    Compares two benchmark reports and flags metrics that got worse by more than the threshold.
+
+    Args:
+        current (dict): The report from this run.
+
+        baseline (dict): A previously saved report.
+
+        threshold (float): The allowed relative slowdown, for example 0.1 for 10 percent.
+
+    Returns:
+        comparison (list): One dictionary per shared metric with the baseline value, current value, ratio, and regression flag.
+    """
+    now = flatten(current['results'])
+    before = flatten(baseline['results'])
+    comparison = []
+
+    for name in sorted(set(now) & set(before)):
+        ratio = now[name] / before[name] if before[name] else float('inf')
+        comparison.append({'metric': name, 'baseline': before[name], 'current': now[name], 'ratio': ratio, 'regression': ratio > 1 + threshold})
+
+    return comparison
+
+def run(sizes: list, repeat: int, routes: list, route_limit: int):
+    """
+    Runs the benchmark for every requested size inside a scratch directory, since get_dataset writes ISS.xml to the working directory.
+
+    Args:
+        sizes (list): The epoch counts to generate.
+
+        repeat (int): The number of repetitions per measurement.
+
+        routes (list): The routes to time.
+
+        route_limit (int): The largest epoch count for which routes are timed.
+
+    Returns:
+        report (dict): The machine-readable benchmark report.
+    """
+    report = {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+        },
+        'results': {},
+    }
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        try:
+            for epochs in sizes:
+                report['results'][str(epochs)] = bench_size(epochs, repeat, routes if epochs <= route_limit else [])
+        finally:
+            os.chdir(cwd)
+
+    return report
+
+# Main function definition
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark iss_tracker against synthetic OEM files.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='epoch counts to benchmark, up to 1000000 (default 5000 50000)')
+    parser.add_argument('--repeat', type=int, default=5, help='repetitions per measurement (default 5)')
+    parser.add_argument('--routes', nargs='*', default=DEFAULT_ROUTES, help='routes to time through the Flask test client')
+    parser.add_argument('--route-limit', type=int, default=50000, help='skip route timings above this epoch count (default 50000)')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    parser.add_argument('--compare', metavar='BASELINE', help='compare against a saved JSON report and exit 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=0.10, help='allowed relative slowdown before flagging a regression (default 0.10)')
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.repeat, args.routes, args.route_limit)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        report['comparison'] = compare(report, baseline, args.threshold)
+        regressions = [row for row in report['comparison'] if row['regression']]
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    for row in regressions:
+        print('REGRESSION {}: {:.6g} -> {:.6g} ({:.0%})'.format(row['metric'], row['baseline'], row['current'], row['ratio'] - 1), file=sys.stderr)
+
+    sys.exit(1 if regressions else 0)
+
+if __name__ == '__main__':
+    main()
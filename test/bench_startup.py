@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+
+# Imports
+import os
+import sys
+import json
+import time
+import socket
+import platform
+import argparse
+import tempfile
+import subprocess
+import statistics
+import urllib.request
+from datetime import datetime, timezone
+
+from oem_generator import generate_oem
+from load_iss_tracker import ROOT, OemHandler, GeocoderHandler, free_port, start_stand_in
+
+# Global variables / constants
+IMPORT_CODE = '''
+import time
+start = time.perf_counter()
+import iss_tracker
+imported = time.perf_counter()
+iss_tracker.create_app()
+created = time.perf_counter()
+print(imported - start, created - imported)
+'''
+
+# Function definitions
+def describe(values: list):
+    """
+    Reduces a list of timings to summary statistics.
+
+    Args:
+        values (list): Durations in seconds.
+
+    Returns:
+        summary (dict): The min, median, and max duration in seconds.
+    """
+    return {'min': min(values), 'median': statistics.median(values), 'max': max(values)}
+
+def measure_import(runs: int):
+    """
+    Times importing iss_tracker and building the app with create_app, each in a fresh interpreter.
+
+    Args:
+        runs (int): The number of interpreters to start.
+
+    Returns:
+        results (dict): Median, min, and max seconds for the import, for create_app, and for the whole interpreter run.
+    """
+    # Without the scheduler, create_app would start downloading the real NASA file and the interpreter would wait for it at exit
+    env = dict(os.environ, PYTHONPATH=ROOT, ISS_REFRESHER='0')
+    imports = []
+    factories = []
+    processes = []
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, '-c', IMPORT_CODE], env=env, capture_output=True, text=True, check=True).stdout
+        processes.append(time.perf_counter() - start)
+        imported, created = output.split()
+        imports.append(float(imported))
+        factories.append(float(created))
+
+    return {'import': describe(imports), 'create_app': describe(factories), 'process': describe(processes)}
+
+def measure_first_response(runs: int, route: str, epochs: int):
+    """
+    Times how long a freshly started service takes to accept connections and to answer its first request, using the local OEM and geocoder stand-ins.
+
+    Args:
+        runs (int): The number of service processes to start.
+
+        route (str): The route requested once the service is listening.
+
+        epochs (int): The number of epochs in the synthetic OEM file.
+
+    Returns:
+        results (dict): Median, min, and max seconds from process start until it listens and until the first response.
+    """
+    oem = start_stand_in(OemHandler, '127.0.0.1', 0.0, 0.0, generate_oem(epochs))
+    geocoder = start_stand_in(GeocoderHandler, '127.0.0.1', 0.0, 0.0)
+    env = dict(os.environ, PYTHONPATH=ROOT, NOMINATIM_SCHEME='http',
+               ISS_OEM_URL='http://{}:{}/ISS.OEM_J2K_EPH.xml'.format(*oem.server_address),
+               NOMINATIM_DOMAIN='{}:{}'.format(*geocoder.server_address))
+    listening = []
+    responding = []
+
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for _ in range(runs):
+                port = free_port()
+                code = "import iss_tracker; iss_tracker.create_app().run(host='127.0.0.1', port={})".format(port)
+                start = time.perf_counter()
+                process = subprocess.Popen([sys.executable, '-c', code], cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                try:
+                    listened, responded = wait_for_response(port, route, process, start)
+                finally:
+                    process.terminate()
+                    process.wait()
+                listening.append(listened)
+                responding.append(responded)
+    finally:
+        oem.shutdown()
+        geocoder.shutdown()
+
+    return {'listening': describe(listening), 'first_response': describe(responding)}
+
+def wait_for_response(port: int, route: str, process, start: float, timeout: float = 60):
+    """
+    Waits until the service accepts connections, then requests a route once.
+
+    Args:
+        port (int): The port the service listens on.
+
+        route (str): The route to request.
+
+        process (Popen): The service process, checked so a crash is reported instead of waiting out the timeout.
+
+        start (float): The perf_counter value when the process was started.
+
+        timeout (float): Seconds to wait before giving up.
+
+    Returns:
+        listened (float): Seconds from start until the first connection was accepted.
+
+        responded (float): Seconds from start until the response to the route was received.
+    """
+    while True:
+        if process.poll() is not None:
+            raise RuntimeError('iss_tracker exited with status {}'.format(process.returncode))
+        if time.perf_counter() - start > timeout:
+            raise RuntimeError('iss_tracker did not start listening on port {} within {} seconds'.format(port, timeout))
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=timeout).close()
+            break
+        except OSError:
+            time.sleep(0.005)
+    listened = time.perf_counter() - start
+
+    with urllib.request.urlopen('http://127.0.0.1:{}{}'.format(port, route), timeout=timeout) as response:
+        response.read()
+    return listened, time.perf_counter() - start
+
+# Main function definition
+def main():
+    parser = argparse.ArgumentParser(description='Measure iss_tracker import time and time to first response.')
+    parser.add_argument('--runs', type=int, default=5, help='fresh processes to start for each measurement (default 5)')
+    parser.add_argument('--route', default='/epochs/0', help='route requested to measure the first response (default /epochs/0)')
+    parser.add_argument('--epochs', type=int, default=5000, help='epochs in the synthetic OEM file (default 5000)')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+
+    report = {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'runs': args.runs,
+            'route': args.route,
+            'epochs': args.epochs,
+        },
+        'results': {
+            'startup': measure_import(args.runs),
+            'server': measure_first_response(args.runs, args.route, args.epochs),
+        },
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+
+# Imports
+import os
+import sys
+import json
+import math
+import time
+import random
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import statistics
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor
+
+from oem_generator import generate_oem
+
+# Global variables / constants
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MIX = '/epochs=1,/epochs?limit=100&offset=50=2,/epochs/<n>=4,/epochs/<n>/speed=4,/epochs/<n>/location=2,/now=2,/comment=1,/header=1,/metadata=1,/analytics=1'
+
+# Class definitions
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Base request handler for the local stand-in servers. Applies the server's configured latency and error rate before answering.
+    """
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        if random.random() < self.server.error_rate:
+            self.send_error(503, 'Injected error')
+            return
+        body, content_type = self.respond()
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class OemHandler(StandInHandler):
+    """
+    Serves the same OEM XML document for every path, standing in for the NASA dataset.
+    """
+    def respond(self):
+        return self.server.content, 'application/xml'
+
+class GeocoderHandler(StandInHandler):
+    """
+    Answers Nominatim style /reverse queries with a placeholder address built from the requested coordinates.
+    """
+    def respond(self):
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+        lat = query.get('lat', ['0'])[0]
+        lon = query.get('lon', ['0'])[0]
+        place = {'lat': lat, 'lon': lon, 'display_name': 'Stand-in place near {}, {}'.format(lat, lon)}
+        return json.dumps(place).encode('utf8'), 'application/json'
+
+# Function definitions
+def free_port():
+    """
+    Finds an unused local TCP port.
+
+    Args:
+        None
+
+    Returns:
+        port (int): A port number that was free when checked.
+    """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_stand_in(handler, host: str, latency: float, error_rate: float, content: bytes = b''):
+    """
+    Starts a stand-in HTTP server on a background thread.
+
+    Args:
+        handler (class): The request handler class, OemHandler or GeocoderHandler.
+
+        host (str): The interface to bind to.
+
+        latency (float): Seconds to wait before answering each request.
+
+        error_rate (float): The fraction of requests answered with a 503 error.
+
+        content (bytes): The document OemHandler serves.
+
+    Returns:
+        server (ThreadingHTTPServer): The running server. Call shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer((host, 0), handler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.error_rate = error_rate
+    server.content = content
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def start_service(oem_url: str, geocoder: str, port: int, workdir: str):
+    """
+    Starts iss_tracker in a subprocess, pointed at the stand-in servers, and waits until it accepts connections.
+
+    Args:
+        oem_url (str): The URL of the OEM stand-in.
+
+        geocoder (str): The host:port of the geocoder stand-in.
+
+        port (int): The port the service listens on.
+
+        workdir (str): The working directory of the service, where it writes its downloaded dataset.
+
+    Returns:
+        process (Popen): The running service process.
+    """
+    env = dict(os.environ, ISS_OEM_URL=oem_url, NOMINATIM_DOMAIN=geocoder, NOMINATIM_SCHEME='http', PYTHONPATH=ROOT)
+    code = "import iss_tracker; iss_tracker.create_app().run(host='127.0.0.1', port={}, threaded=True)".format(port)
+    process = subprocess.Popen([sys.executable, '-c', code], cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('iss_tracker exited with status {}'.format(process.returncode))
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+
+    process.terminate()
+    raise RuntimeError('iss_tracker did not start listening on port {}'.format(port))
+
+def parse_mix(mix: str):
+    """
+    Parses a comma separated list of route=weight pairs. A '<n>' in a route is replaced with a random epoch index on every request.
+
+    Args:
+        mix (str): For example '/epochs=1,/epochs/<n>=4,/now=2'.
+
+    Returns:
+        routes (list): The route templates.
+
+        weights (list): The matching relative weights as floats.
+    """
+    routes = []
+    weights = []
+    for pair in mix.split(','):
+        route, _, weight = pair.rpartition('=')
+        routes.append(route)
+        weights.append(float(weight))
+    return routes, weights
+
+def percentile(values: list, pct: float):
+    """
+    Finds a percentile of a list of values using the nearest-rank method.
+
+    Args:
+        values (list): The sample values.
+
+        pct (float): The percentile between 0 and 100.
+
+    Returns:
+        value (float): The value at that percentile.
+    """
+    ordered = sorted(values)
+    rank = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+def drive(target: str, routes: list, weights: list, epochs: int, concurrency: int, duration: float, timeout: float):
+    """
+    Sends requests from a pool of workers for a fixed duration, picking each route at random according to the mix.
+
+    Args:
+        target (str): The base URL of the service.
+
+        routes (list): The route templates.
+
+        weights (list): The relative weights of each route.
+
+        epochs (int): The number of epochs in the dataset, used to fill in '<n>'.
+
+        concurrency (int): The number of concurrent workers.
+
+        duration (float): How long to send requests for, in seconds.
+
+        timeout (float): The per-request timeout in seconds.
+
+    Returns:
+        samples (list): One (route, latency, ok) tuple per request.
+    """
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        samples = []
+        while time.perf_counter() < deadline:
+            route = random.choices(routes, weights)[0]
+            url = target + route.replace('<n>', str(random.randrange(epochs)))
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=timeout) as response:
+                    response.read()
+                ok = True
+            except (urllib.error.URLError, OSError):
+                ok = False
+            samples.append((route, time.perf_counter() - start, ok))
+        return samples
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(worker) for _ in range(concurrency)]
+        return [sample for future in futures for sample in future.result()]
+
+def summarize(samples: list, duration: float):
+    """
+    Computes request counts, error rates, throughput, and latency percentiles per route and overall.
+
+    Args:
+        samples (list): The (route, latency, ok) tuples from drive().
+
+        duration (float): The length of the run in seconds.
+
+    Returns:
+        summary (dict): Statistics keyed by route, plus an 'all' entry.
+    """
+    groups = {'all': samples}
+    for sample in samples:
+        groups.setdefault(sample[0], []).append(sample)
+
+    summary = {}
+    for route, group in groups.items():
+        latencies = [latency for _, latency, _ in group]
+        errors = sum(1 for _, _, ok in group if not ok)
+        summary[route] = {
+            'requests': len(group),
+            'errors': errors,
+            'error_rate': errors / len(group) if group else 0.0,
+            'throughput': len(group) / duration,
+            'p50': percentile(latencies, 50) if latencies else None,
+            'p99': percentile(latencies, 99) if latencies else None,
+            'max': max(latencies) if latencies else None,
+            'mean': statistics.mean(latencies) if latencies else None,
+        }
+    return summary
+
+def print_table(concurrency: int, summary: dict):
+    """
+    Prints a per-route summary table to stderr.
+
+    Args:
+        concurrency (int): The concurrency level of the run.
+
+        summary (dict): The output of summarize().
+
+    Returns:
+        None
+    """
+    print('\nconcurrency {}'.format(concurrency), file=sys.stderr)
+    print('{:<32} {:>8} {:>8} {:>9} {:>9} {:>9} {:>9}'.format('route', 'requests', 'errors', 'req/s', 'p50 ms', 'p99 ms', 'max ms'), file=sys.stderr)
+    for route, stats in sorted(summary.items()):
+        if not stats['requests']:
+            continue
+        print('{:<32} {:>8} {:>8.1%} {:>9.1f} {:>9.1f} {:>9.1f} {:>9.1f}'.format(route, stats['requests'], stats['error_rate'], stats['throughput'], stats['p50'] * 1000, stats['p99'] * 1000, stats['max'] * 1000), file=sys.stderr)
+
+# Main function definition
+def main():
+    parser = argparse.ArgumentParser(description='Load test iss_tracker against local NASA and geocoder stand-ins.')
+    parser.add_argument('--target', help='base URL of an already running service; by default one is started against the stand-ins')
+    parser.add_argument('--bind', default='127.0.0.1', help='interface the stand-in servers listen on (default 127.0.0.1)')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='comma separated route=weight pairs; <n> is replaced by a random epoch index')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16], help='concurrency levels to run, one after another (default 1 4 16)')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds to run at each concurrency level (default 10)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='per-request timeout in seconds (default 30)')
+    parser.add_argument('--epochs', type=int, default=5000, help='epochs in the synthetic OEM file (default 5000)')
+    parser.add_argument('--oem-latency', type=float, default=0.0, help='seconds the OEM stand-in waits before answering')
+    parser.add_argument('--oem-error-rate', type=float, default=0.0, help='fraction of OEM requests answered with a 503')
+    parser.add_argument('--geo-latency', type=float, default=0.0, help='seconds the geocoder stand-in waits before answering')
+    parser.add_argument('--geo-error-rate', type=float, default=0.0, help='fraction of geocoder requests answered with a 503')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+
+    routes, weights = parse_mix(args.mix)
+    oem = start_stand_in(OemHandler, args.bind, args.oem_latency, args.oem_error_rate, generate_oem(args.epochs))
+    geocoder = start_stand_in(GeocoderHandler, args.bind, args.geo_latency, args.geo_error_rate)
+    oem_url = 'http://{}:{}/ISS.OEM_J2K_EPH.xml'.format(*oem.server_address)
+    geocoder_domain = '{}:{}'.format(*geocoder.server_address)
+
+    report = {
+        'config': {
+            'mix': dict(zip(routes, weights)),
+            'epochs': args.epochs,
+            'duration': args.duration,
+            'oem_url': oem_url,
+            'geocoder': geocoder_domain,
+            'oem_latency': args.oem_latency,
+            'oem_error_rate': args.oem_error_rate,
+            'geo_latency': args.geo_latency,
+            'geo_error_rate': args.geo_error_rate,
+        },
+        'runs': [],
+    }
+
+    process = None
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            target = args.target
+            if target is None:
+                port = free_port()
+                process = start_service(oem_url, geocoder_domain, port, workdir)
+                target = 'http://127.0.0.1:{}'.format(port)
+            report['config']['target'] = target
+
+            for concurrency in args.concurrency:
+                samples = drive(target.rstrip('/'), routes, weights, args.epochs, concurrency, args.duration, args.timeout)
+                summary = summarize(samples, args.duration)
+                report['runs'].append({'concurrency': concurrency, 'routes': summary})
+                print_table(concurrency, summary)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+            oem.shutdown()
+            geocoder.shutdown()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+# Imports
+import math
+import argparse
+from datetime import datetime, timedelta, timezone
+
+# Global variables / constants
+MU = 398600.4418 # km^3/s^2, Earth's gravitational parameter
+R_EARTH = 6371 # km, matches the radius used in iss_tracker.py
+
+# Function definitions
+def format_epoch(time: datetime):
+    """
+    Formats a datetime the way the NASA OEM file does, as a UTC day-of-year timestamp with millisecond precision.
+
+    Args:
+        time (datetime): The time to format.
+
+    Returns:
+        epoch (str): The timestamp string, for example '2024-064T12:00:00.000Z'.
+    """
+    return time.strftime('%Y-%jT%H:%M:%S.') + '{:03d}Z'.format(time.microsecond // 1000)
+
+def state_vectors(epochs: int, step: float = 240.0, altitude: float = 420.0, inclination: float = 51.6, start: datetime = None):
+    """
+    Generates state vectors for a circular orbit similar to the ISS trajectory.
+
+    Args:
+        epochs (int): The number of state vectors to generate.
+
+        step (float): The time between consecutive epochs in seconds.
+
+        altitude (float): The orbit altitude above the mean Earth radius in km.
+
+        inclination (float): The orbit inclination in degrees.
+
+        start (datetime): The UTC time of the first epoch.
+
+    Returns:
+        vectors (generator): Tuples of (epoch, x, y, z, vx, vy, vz) with positions in km and velocities in km/s.
+    """
+    if start is None:
+        start = datetime(2024, 3, 4, 12, 0, 0, tzinfo=timezone.utc)
+
+    radius = R_EARTH + altitude
+    speed = math.sqrt(MU / radius)
+    rate = speed / radius
+    inc = math.radians(inclination)
+
+    for index in range(epochs):
+        theta = rate * step * index
+        px = radius * math.cos(theta)
+        py = radius * math.sin(theta)
+        pvx = -speed * math.sin(theta)
+        pvy = speed * math.cos(theta)
+
+        # Rotating the orbital plane about the X axis by the inclination
+        yield (format_epoch(start + timedelta(seconds=step * index)),
+               px, py * math.cos(inc), py * math.sin(inc),
+               pvx, pvy * math.cos(inc), pvy * math.sin(inc))
+
+def generate_oem(epochs: int, step: float = 240.0, object_name: str = 'ISS', object_id: str = '1998-067-A'):
+    """
+    Builds a synthetic CCSDS OEM XML document with the same layout as the NASA ISS trajectory file.
+
+    Args:
+        epochs (int): The number of state vectors in the data section.
+
+        step (float): The time between consecutive epochs in seconds.
+
+        object_name (str): The value of the OBJECT_NAME metadata field.
+
+        object_id (str): The value of the OBJECT_ID metadata field.
+
+    Returns:
+        content (bytes): The encoded XML document.
+    """
+    vectors = list(state_vectors(epochs, step=step))
+    start_time = vectors[0][0] if vectors else format_epoch(datetime(2024, 3, 4, 12, tzinfo=timezone.utc))
+    stop_time = vectors[-1][0] if vectors else start_time
+
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n',
+        '<ndm><oem id="CCSDS_OEM_VERS" version="2.0">',
+        '<header><CREATION_DATE>{}</CREATION_DATE><ORIGINATOR>SYNTHETIC</ORIGINATOR></header>'.format(start_time),
+        '<body><segment><metadata>',
+        '<OBJECT_NAME>{}</OBJECT_NAME><OBJECT_ID>{}</OBJECT_ID>'.format(object_name, object_id),
+        '<CENTER_NAME>EARTH</CENTER_NAME><REF_FRAME>EME2000</REF_FRAME><TIME_SYSTEM>UTC</TIME_SYSTEM>',
+        '<START_TIME>{}</START_TIME><STOP_TIME>{}</STOP_TIME>'.format(start_time, stop_time),
+        '</metadata><data>',
+        '<COMMENT>Synthetic trajectory for benchmarking</COMMENT>',
+        '<COMMENT>MASS=459154.20 [kg]</COMMENT>',
+        '<COMMENT>DRAG_AREA=1487.80 [m**2]</COMMENT>',
+        '<COMMENT>DRAG_COEFF=2.40</COMMENT>',
+    ]
+
+    row = ('<stateVector><EPOCH>{}</EPOCH>'
+           '<X units="km">{:.9f}</X><Y units="km">{:.9f}</Y><Z units="km">{:.9f}</Z>'
+           '<X_DOT units="km/s">{:.12f}</X_DOT><Y_DOT units="km/s">{:.12f}</Y_DOT><Z_DOT units="km/s">{:.12f}</Z_DOT>'
+           '</stateVector>')
+    parts.extend(row.format(*vector) for vector in vectors)
+    parts.append('</data></segment></body></oem></ndm>\n')
+
+    return ''.join(parts).encode('utf8')
+
+def write_oem(path: str, epochs: int, step: float = 240.0):
+    """
+    Writes a synthetic OEM XML document to disk.
+
+    Args:
+        path (str): The output file path.
+
+        epochs (int): The number of state vectors in the data section.
+
+        step (float): The time between consecutive epochs in seconds.
+
+    Returns:
+        size (int): The number of bytes written.
+    """
+    content = generate_oem(epochs, step=step)
+    with open(path, 'wb') as f:
+        f.write(content)
+    return len(content)
+
+# Main function definition
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic ISS OEM XML file.')
+    parser.add_argument('path', help='output file path')
+    parser.add_argument('--epochs', type=int, default=5000, help='number of state vectors (default 5000)')
+    parser.add_argument('--step', type=float, default=240.0, help='seconds between epochs (default 240)')
+    args = parser.parse_args()
+
+    size = write_oem(args.path, args.epochs, step=args.step)
+    print('Wrote {} epochs ({} bytes) to {}'.format(args.epochs, size, args.path))
+
+if __name__ == '__main__':
+    main()
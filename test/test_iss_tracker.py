@@ -7,10 +7,22 @@ import statistics
 from statistics import mean
 import requests
 import math
+import os
 from math import sqrt
-from iss_tracker import get_dataset, full_epoch, time_range, calculate_speed, return_iss_dataset, return_iss_now, return_iss_speed, return_iss_state, app
+
+# Keeps the app built for the tests from refreshing the real feeds in the background
+os.environ.setdefault('ISS_REFRESHER', '0')
+
+from iss_tracker import get_dataset, full_epoch, time_range, calculate_speed, compute_analytics, create_app, encode_json, register_feed, load_feeds, FEEDS, return_iss_dataset, return_iss_now, return_iss_speed, return_iss_state, app
+import iss_tracker
+import sys
+import threading
+import subprocess
 import pytest
+import xmltodict
 from flask import Flask, request
+from unittest import mock
+from oem_generator import generate_oem
 
 # Global variables / constants
 app.testing = True
@@ -18,6 +30,58 @@ client = app.test_client()
 # Class definitions
 
 # Function definitions
+def synthetic_states(epochs: int):
+    """
+    Builds the states dictionary get_dataset returns, from a synthetic OEM file.
+
+    Args:
+        epochs (int): The number of state vectors.
+
+    Returns:
+        states (dict): The state vectors under the 'newtime' key.
+    """
+    reader = xmltodict.parse(generate_oem(epochs))
+    return {'newtime': reader['ndm']['oem']['body']['segment']['data']['stateVector']}
+
+@pytest.fixture
+def synthetic_feed(tmp_path, monkeypatch):
+    """
+    Serves synthetic OEM files in place of the real feeds. Downloads go to a mocked requests.get and are written to a scratch directory, and the feed registry is restored after the test.
+
+    Args:
+        tmp_path (Path): The pytest scratch directory.
+
+        monkeypatch (MonkeyPatch): The pytest patching fixture.
+
+    Returns:
+        register (function): Registers a feed that downloads a synthetic file with the given number of epochs and returns the feed. Extra keyword arguments are passed to generate_oem.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(iss_tracker, 'FEEDS', dict(FEEDS))
+
+    def register(epochs: int, feed_id: str = 'iss', **kwargs):
+        response = mock.Mock(status_code=200, content=generate_oem(epochs, **kwargs))
+        monkeypatch.setattr('requests.get', mock.Mock(return_value=response))
+        return register_feed(feed_id, 'http://localhost/{}.xml'.format(feed_id.upper()))
+    return register
+
+def test_get_dataset(synthetic_feed):
+    """
+    Testing truths to validate the get_dataset function against a synthetic OEM file.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    feed = synthetic_feed(25)
+    states, summary, items = get_dataset(feed.url)
+    assert items == 25
+    assert len(states['newtime']) == 25
+    assert len(summary['comment']) == 4
+    assert states['newtime'][0]['EPOCH'] == '2024-064T12:00:00.000Z'
+
 def test_get_dataset_exceptions():
     """
     Testing how the get_dataset function handles errors. 
@@ -91,6 +155,280 @@ def test_calculate_speed_exceptions():
     with pytest.raises(TypeError):
         calculate_speed([], 0)     
 
+def test_compute_analytics():
+    """
+    Testing truths to validate the compute_analytics function on a synthetic circular orbit at 420 km.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    analytics = compute_analytics(synthetic_states(100), 100)
+    assert analytics['epochs'] == 100
+    assert round(analytics['altitude']['p50']) == 420
+    assert round(analytics['speed']['max'], 2) == 7.66
+    assert round(analytics['period']['mean'], 1) == 92.8
+    assert round(analytics['window_minutes']) == 396
+    assert round(analytics['orbits'], 2) == 4.27
+    assert len(analytics['series']['speed']) == 100
+    assert compute_analytics({'newtime': []}, 0) == {'epochs': 0}
+
+def test_return_iss_analytics(synthetic_feed):
+    """
+    Testing truths to validate the return_iss_analytics function reads the published snapshot.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    synthetic_feed(10)
+    response = client.get('/analytics')
+    assert response.status_code == 200
+    assert response.get_json()['epochs'] == 10
+
+def test_load_feeds(monkeypatch):
+    """
+    Testing truths to validate the load_feeds function registers the ISS feed and the configured feeds.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    monkeypatch.setattr(iss_tracker, 'FEEDS', {})
+    load_feeds('{"css": {"url": "http://localhost/CSS.xml", "refresh": 60}}')
+    assert sorted(iss_tracker.FEEDS) == ['css', 'iss']
+    assert iss_tracker.FEEDS['css'].refresh == 60
+    load_feeds('not json')
+    assert sorted(iss_tracker.FEEDS) == ['css', 'iss']
+
+def test_return_objects(synthetic_feed):
+    """
+    Testing truths to validate the routes namespaced by object read from that object's snapshot.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    feed = synthetic_feed(10, 'css', object_name='CSS', object_id='2021-035-A')
+    metadata = client.get('/objects/css/metadata').get_json()
+    state = client.get('/objects/css/epochs/3').get_json()
+    assert metadata['OBJECT_NAME'] == ['CSS']
+    assert len(state) == 6
+    assert feed.snapshot.items == 10
+    assert client.get('/objects').get_json()['css']['epochs'] == 10
+    assert client.get('/objects/nothing/epochs').status_code == 404
+
+def test_return_objects_iss(synthetic_feed):
+    """
+    Testing that the ISS routes under /objects/iss answer directly instead of redirecting to the unprefixed routes.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    feed = synthetic_feed(10)
+    state = client.get('/objects/iss/epochs/3')
+    metadata = client.get('/objects/iss/metadata')
+    window = client.get('/objects/iss/epochs?limit=2&offset=1')
+    row = feed.snapshot.states['newtime'][3]
+    assert state.status_code == 200
+    assert state.get_json() == [row['X']['#text'], row['Y']['#text'], row['Z']['#text'], row['X_DOT']['#text'], row['Y_DOT']['#text'], row['Z_DOT']['#text']]
+    assert metadata.status_code == 200
+    assert window.status_code == 200
+    assert len(window.get_json()['newtime']) == 1
+
+def test_lazy_imports():
+    """
+    Testing that importing iss_tracker does not load its heavy dependencies or build the app.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = "import sys, iss_tracker; print(sorted(m for m in ('flask', 'geopy', 'numpy', 'requests', 'xmltodict') if m in sys.modules), 'app' in vars(iss_tracker))"
+    output = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True).stdout
+    assert output.strip() == '[] False'
+
+def test_module_app():
+    """
+    Testing that the module level app does not start the refresh scheduler, even with the scheduler enabled.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {key: value for key, value in os.environ.items() if key != 'ISS_REFRESHER'}
+    env['ISS_OEM_URL'] = 'http://127.0.0.1:9/ISS.xml'
+    code = "import iss_tracker; from iss_tracker import app; print(iss_tracker.refresher)"
+    output = subprocess.run([sys.executable, '-c', code], cwd=root, env=env, capture_output=True, text=True, check=True).stdout
+    assert output.strip() == 'None'
+
+def test_create_app():
+    """
+    Testing truths to validate the create_app function builds independent apps with every route.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    first = create_app()
+    second = create_app()
+    assert first is not second
+    rules = [rule.rule for rule in first.url_map.iter_rules()]
+    assert '/epochs/<epoch>/location' in rules
+    assert '/objects/<object_id>/analytics' in rules
+
+def test_start_refresher(monkeypatch):
+    """
+    Testing truths to validate the start_refresher function runs one scheduler that survives a failed refresh.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    calls = []
+    retried = threading.Event()
+    def refresh_feeds():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError('download failed')
+        retried.set()
+        # Parks the thread so it never reaches the real feeds once the patch is undone
+        threading.Event().wait()
+
+    monkeypatch.setattr(iss_tracker, 'refresh_feeds', refresh_feeds)
+    monkeypatch.setattr(iss_tracker, 'refresher', None)
+    create_app(refresh = True)
+    thread = iss_tracker.refresher
+    assert retried.wait(5)
+    assert thread.is_alive()
+    assert iss_tracker.start_refresher() is thread
+    assert len(calls) == 2
+
+def test_encode_json():
+    """
+    Testing truths to validate the encode_json function matches Flask's default JSON output.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    from flask.json.provider import DefaultJSONProvider
+    test_row = {'EPOCH': '2024-045T12:00:00.000Z', 'X': {'@units': 'km', '#text': '-3'}, 'Z_DOT': {'@units': 'km/s', '#text': '8'}}
+    assert encode_json(test_row) == DefaultJSONProvider(app).dumps(test_row, separators=(',', ':')).encode('utf8')
+    assert encode_json([1.5, None, 'a']) == b'[1.5,null,"a"]'
+    assert encode_json({'name': 'Fran\u00e7ois'}) == DefaultJSONProvider(app).dumps({'name': 'Fran\u00e7ois'}, separators=(',', ':')).encode('utf8')
+
+def test_json_provider():
+    """
+    Testing truths to validate the app's JSON provider honours the json.dumps arguments it is given.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    from flask.json.provider import DefaultJSONProvider
+    default = DefaultJSONProvider(app)
+    test_obj = {'b': [1, 2], 'a': {'c': None}}
+    assert app.json.dumps(test_obj) == default.dumps(test_obj)
+    assert app.json.dumps(test_obj, indent=None) == default.dumps(test_obj, indent=None)
+    assert app.json.dumps(test_obj, separators=(',', ':')) == '{"a":{"c":null},"b":[1,2]}'
+    assert app.json.dumps(test_obj, indent=0) == default.dumps(test_obj, indent=0)
+    assert app.json.dumps(test_obj, indent=0, separators=(',', ':')) == default.dumps(test_obj, indent=0, separators=(',', ':'))
+    assert app.json.dumps(test_obj, indent=2) == default.dumps(test_obj, indent=2)
+    assert app.json.dumps(test_obj, indent=4) == default.dumps(test_obj, indent=4)
+    assert app.json.dumps(test_obj, sort_keys=False, separators=(',', ':')) == '{"b":[1,2],"a":{"c":null}}'
+    assert app.json.dumps({'d': {1, 2}}, default=sorted, separators=(',', ':')) == '{"d":[1,2]}'
+    assert app.json.dumps('\u00e9', separators=(',', ':')) == default.dumps('\u00e9', separators=(',', ':'))
+    assert app.json.dumps('\u00e9', separators=(',', ':'), ensure_ascii=False) == '"\u00e9"'
+    with app.app_context():
+        assert app.json.response({'name': '\u00e9'}).get_data() == default.response({'name': '\u00e9'}).get_data()
+    assert app.json.loads('{"a": 1.5}', parse_float=str) == {'a': '1.5'}
+
+def test_return_iss_dataset_fragments(synthetic_feed):
+    """
+    Testing truths to validate the return_iss_dataset function assembles its response from the pre-encoded rows.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    feed = synthetic_feed(20)
+    everything = client.get('/epochs').get_json()['newtime']
+    window = client.get('/epochs?limit=15&offset=5').get_json()['newtime']
+    assert everything == feed.snapshot.states['newtime']
+    assert window == everything[10:15]
+
+def test_get_snapshot_stale(synthetic_feed, monkeypatch):
+    """
+    Testing truths to validate the get_snapshot function serves an expired snapshot while the scheduler runs, and downloads it inline otherwise.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    feed = synthetic_feed(5)
+    assert client.get('/epochs/3').status_code == 200
+    assert requests.get.call_count == 1
+
+    feed.refresh = 0
+    monkeypatch.setattr(iss_tracker, 'refresher', mock.Mock(is_alive=mock.Mock(return_value=True)))
+    assert client.get('/epochs/3').status_code == 200
+    assert requests.get.call_count == 1
+
+    monkeypatch.setattr(iss_tracker, 'refresher', None)
+    assert client.get('/epochs/3').status_code == 200
+    assert requests.get.call_count == 2
+
+def test_json_response_debug(synthetic_feed):
+    """
+    Testing truths to validate routes answered from pre-encoded bytes are pretty-printed in debug mode like the other routes.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    debug_app = create_app(refresh = False)
+    debug_app.debug = True
+    debug_client = debug_app.test_client()
+    synthetic_feed(5)
+    for url in ('/epochs', '/comment', '/header', '/metadata', '/analytics', '/epochs/3'):
+        response = debug_client.get(url)
+        assert response.status_code == 200
+        assert response.get_data() == debug_app.json.response(response.get_json()).get_data()
+        assert b'\n  ' in response.get_data()
+    assert len(debug_client.get('/epochs').get_json()['newtime']) == 5
+
 def test_return_iss_dataset(client):
     """
     Testing truths to validate the return_iss_dataset funciton.
@@ -266,6 +604,9 @@ def unit_test():
     test_full_epoch_exceptions()
     test_calculate_speed()
     test_calculate_speed_exceptions()
+    test_compute_analytics()
+    test_lazy_imports()
+    test_create_app()
 
     # Route function tests
         # main check is to verify the route works, not the return